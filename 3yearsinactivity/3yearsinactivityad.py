@@ -2,9 +2,100 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from datetime import datetime, timedelta
+from datetime import timedelta
 import io
-import base64
+
+# Columns consumed by the checker; any other columns in the upload are skipped at parse time
+ACCOUNT_COLUMNS = [
+    'Account ID', 'Account Type', 'Branch', 'Customer Type', 'Account Balance', 'KYC Status',
+    'Last Transaction Date', 'Email Contact Attempt', 'SMS Contact Attempt', 'Phone Call Attempt',
+    'Account Status'
+]
+
+# Columns shown in the data table and written to the CSV reports
+REPORT_COLUMNS = ACCOUNT_COLUMNS + [
+    'days_inactive', 'years_inactive', 'recommended_action', 'contact_status', 'risk_category',
+    'compliance_priority'
+]
+
+# Columns offered as multiselect filters in the Data Table tab
+FILTER_COLUMNS = [
+    'Account Type', 'Branch', 'Customer Type', 'KYC Status', 'recommended_action', 'risk_category',
+    'compliance_priority'
+]
+
+# Explicit dtypes so read_csv does not have to infer them; low-cardinality text columns are categorical
+ACCOUNT_DTYPES = {
+    'Account Type': 'category',
+    'Branch': 'category',
+    'Customer Type': 'category',
+    'KYC Status': 'category',
+    'Email Contact Attempt': 'category',
+    'SMS Contact Attempt': 'category',
+    'Phone Call Attempt': 'category',
+    'Account Balance': 'float64',
+    'Last Transaction Date': 'str',
+}
+
+# Account types offered by the checker, in their canonical spelling
+ACCOUNT_TYPES = ["Savings/Call/Current", "Fixed Deposit", "Investment", "Safe Deposit"]
+
+# Format of the Last Transaction Date column
+DATE_FORMAT = '%Y-%m-%d'
+
+# Calendar constants used by the inactivity calculations
+DAYS_PER_YEAR = 365
+ONE_DAY = np.timedelta64(1, 'D')
+
+# Number of set bits for each value of the packed 3-bit contact attempt field
+CONTACT_BIT_COUNTS = np.array([bin(bits).count('1') for bits in range(8)], dtype=np.int8)
+
+# Integer representation of NaT in a datetime64 array viewed as int64
+NAT_TICKS = np.iinfo(np.int64).min
+
+
+@st.cache_resource(show_spinner=False)
+def parse_csv(file_bytes):
+    """
+    Parse the uploaded account CSV, cached on the file contents across reruns and sessions.
+    The returned dataframe is shared between sessions and must be treated as read-only.
+    """
+    # Load only the required columns with explicit dtypes.
+    # The pyarrow engine parses the file with multiple threads.
+    accounts_df = pd.read_csv(
+        io.BytesIO(file_bytes),
+        engine='pyarrow',
+        usecols=ACCOUNT_COLUMNS,
+        dtype=ACCOUNT_DTYPES
+    )
+
+    # Convert Last Transaction Date with a fixed format; repeated dates are parsed only once
+    accounts_df['Last Transaction Date'] = pd.to_datetime(
+        accounts_df['Last Transaction Date'], format=DATE_FORMAT, errors='coerce', cache=True
+    )
+
+    # Normalize the Account Type labels once: strip whitespace and map case variants of a known type
+    # onto its canonical spelling, merging categories that now share a label. Detection, filters,
+    # charts and the type-specific exports then all see a single label per account type.
+    # The extra trailing -1 keeps code -1 (missing account type) missing.
+    account_type = accounts_df['Account Type']
+    canonical_types = {t.lower(): t for t in ACCOUNT_TYPES}
+    labels = pd.Index([canonical_types.get(c.strip().lower(), c.strip()) for c in account_type.cat.categories])
+    merged_labels = labels.unique()
+    new_codes = np.append(merged_labels.get_indexer(labels), -1)
+    accounts_df['Account Type'] = pd.Categorical.from_codes(
+        new_codes[account_type.cat.codes.values], categories=merged_labels
+    )
+
+    # Pack the three Yes/No contact attempts into one uint8 bit field (email=1, SMS=2, phone=4).
+    # This helper column is not part of REPORT_COLUMNS, so it is never displayed or exported.
+    accounts_df['_contact_bits'] = (
+        (accounts_df['Email Contact Attempt'] == 'Yes').to_numpy(np.uint8) |
+        ((accounts_df['SMS Contact Attempt'] == 'Yes').to_numpy(np.uint8) << 1) |
+        ((accounts_df['Phone Call Attempt'] == 'Yes').to_numpy(np.uint8) << 2)
+    )
+
+    return accounts_df
 
 
 class AccountInactivityChecker:
@@ -18,16 +109,22 @@ class AccountInactivityChecker:
         """Initialize the checker"""
         self.accounts_df = None
         self.inactive_accounts = None
-        self.today = datetime.now()
+        self.compliance_results = None
+        self.loaded_file_id = None
+        # Reference date at day granularity: transaction dates carry no time of day
+        self.today = np.datetime64('today', 'D')
 
     def load_account_data(self, accounts_file):
         """Load account data from an uploaded file"""
-        try:
-            # Load accounts data
-            self.accounts_df = pd.read_csv(accounts_file)
+        # The checker lives across reruns, so an upload that is already loaded needs no work at all
+        file_id = getattr(accounts_file, 'file_id', None)
+        if file_id is not None and file_id == self.loaded_file_id:
+            return True
 
-            # Convert Last Transaction Date to datetime
-            self.accounts_df['Last Transaction Date'] = pd.to_datetime(self.accounts_df['Last Transaction Date'])
+        try:
+            # Parse via the cached helper so the same file is parsed, and held in memory, only once
+            self.accounts_df = parse_csv(accounts_file.getvalue())
+            self.loaded_file_id = file_id
 
             return True
         except Exception as e:
@@ -42,24 +139,49 @@ class AccountInactivityChecker:
             st.error("Error: Account data not loaded.")
             return None
 
-        # Calculate the cutoff date
-        cutoff_date = self.today - timedelta(days=inactivity_years * 365)
-
-        # Filter accounts based on type and inactivity period
-        inactive_accounts = self.accounts_df[
-            (self.accounts_df['Account Type'].isin(account_types)) &
-            (self.accounts_df['Last Transaction Date'] < cutoff_date)
-            ].copy()
-
-        # Add inactivity duration information
-        inactive_accounts['days_inactive'] = (self.today - inactive_accounts['Last Transaction Date']).dt.days
-        inactive_accounts['years_inactive'] = inactive_accounts['days_inactive'] / 365
-        inactive_accounts['years_inactive'] = inactive_accounts['years_inactive'].round(2)
+        # Convert the reference date and inactivity period to datetime64 scalars once.
+        # An account is inactive if its last transaction falls on or before the cutoff date.
+        today = np.datetime64(self.today, 'D')
+        cutoff_date = today - np.timedelta64(timedelta(days=inactivity_years * DAYS_PER_YEAR))
+
+        # Match account types against the categories rather than every row, then look each row's
+        # category code up in the resulting boolean table. Labels were normalized in parse_csv.
+        # The extra trailing False is hit by code -1, which marks a missing account type.
+        account_type = self.accounts_df['Account Type']
+        type_selected = np.append(account_type.cat.categories.isin(account_types), False)
+
+        # Compare dates as int64 ticks in the column's own unit, which avoids datetime64 dispatch.
+        # NaT is stored as the minimum int64, so it has to be excluded explicitly.
+        last_transaction = self.accounts_df['Last Transaction Date'].values
+        unit = np.datetime_data(last_transaction.dtype)[0]
+        last_ticks = last_transaction.view('i8')
+        cutoff_ticks = cutoff_date.astype(f'datetime64[{unit}]').view('i8')
+
+        # Filter accounts based on type and inactivity period using a single
+        # vectorized mask over the underlying arrays
+        inactive_mask = (
+            type_selected[account_type.cat.codes.values] &
+            (last_ticks <= cutoff_ticks) &
+            (last_ticks != NAT_TICKS)
+        )
 
-        # Sort by inactivity duration
-        inactive_accounts = inactive_accounts.sort_values('days_inactive', ascending=False)
+        # Add inactivity duration information, computed only for the rows that survived the filter
+        today_ticks = today.astype(f'datetime64[{unit}]').view('i8')
+        ticks_per_day = ONE_DAY.astype(f'timedelta64[{unit}]').view('i8')
+        days_inactive = (today_ticks - last_ticks[inactive_mask]) // ticks_per_day
+
+        # Sort by inactivity duration (longest first) on the small int64 array, then gather the
+        # matching rows in that order with a single take instead of filtering and re-sorting the frame.
+        # assign builds the result frame in one step, so no separate defensive copy is needed.
+        order = np.argsort(-days_inactive, kind='stable')
+        days_inactive = days_inactive[order]
+        inactive_accounts = self.accounts_df.iloc[np.flatnonzero(inactive_mask)[order]].assign(
+            days_inactive=days_inactive,
+            years_inactive=np.round(days_inactive / DAYS_PER_YEAR, 2)
+        )
 
         self.inactive_accounts = inactive_accounts
+        self.compliance_results = None
         return inactive_accounts
 
     def mark_for_compliance_action(self, notify_years, freeze_years, escalate_years):
@@ -84,124 +206,150 @@ class AccountInactivityChecker:
             st.warning("No inactive accounts to mark for compliance action.")
             return None
 
-        # Make a copy to avoid SettingWithCopyWarning
-        result_df = self.inactive_accounts.copy()
-
-        # Define compliance action based on inactivity duration
-        def determine_action(years_inactive):
-            if years_inactive > escalate_years:
-                return 'ESCALATE'
-            elif years_inactive > freeze_years:
-                return 'FREEZE'
-            elif years_inactive > notify_years:
-                return 'NOTIFY'
-            else:
-                return 'MONITOR'
-
-        result_df['recommended_action'] = result_df['years_inactive'].apply(determine_action)
-
-        # Add contact status
-        def determine_contact_status(row):
-            attempts = 0
-            if row['Email Contact Attempt'] == 'Yes':
-                attempts += 1
-            if row['SMS Contact Attempt'] == 'Yes':
-                attempts += 1
-            if row['Phone Call Attempt'] == 'Yes':
-                attempts += 1
-
-            if attempts == 0:
-                return 'No Contact'
-            elif attempts < 3:
-                return 'Partial Contact'
-            else:
-                return 'Full Contact'
-
-        result_df['contact_status'] = result_df.apply(determine_contact_status, axis=1)
-
-        # Add risk category based on account balance
-        def determine_risk(balance):
-            if balance > 300000:
-                return 'HIGH'
-            elif balance > 100000:
-                return 'MEDIUM'
-            else:
-                return 'LOW'
-
-        result_df['risk_category'] = result_df['Account Balance'].apply(determine_risk)
-
-        # Add compliance priority based on risk and inactivity
-        def determine_priority(row):
-            risk_score = {'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}
-            action_score = {'ESCALATE': 3, 'FREEZE': 2, 'NOTIFY': 1, 'MONITOR': 0}
-            kyc_score = 2 if row['KYC Status'] == 'Expired' else 0
-
-            total_score = risk_score.get(row['risk_category'], 0) + action_score.get(row['recommended_action'],
-                                                                                     0) + kyc_score
+        accounts = self.inactive_accounts
+
+        # Define compliance action based on inactivity duration; the first matching threshold wins
+        years_inactive = accounts['years_inactive'].to_numpy()
+        action_conditions = [
+            years_inactive > escalate_years, years_inactive > freeze_years, years_inactive > notify_years
+        ]
+        recommended_action = np.select(action_conditions, ['ESCALATE', 'FREEZE', 'NOTIFY'], default='MONITOR')
+
+        # Add contact status from the number of channels on which contact was attempted,
+        # counted from the packed contact bits with a lookup table
+        attempts = CONTACT_BIT_COUNTS[accounts['_contact_bits'].to_numpy()]
+        contact_status = np.select(
+            [attempts == 0, attempts < 3],
+            ['No Contact', 'Partial Contact'],
+            default='Full Contact'
+        )
 
-            if total_score >= 6:
-                return 'CRITICAL'
-            elif total_score >= 4:
-                return 'HIGH'
-            elif total_score >= 2:
-                return 'MEDIUM'
-            else:
-                return 'LOW'
+        # Add risk category based on account balance: LOW up to 100k, MEDIUM up to 300k, HIGH above
+        risk_category = pd.cut(
+            accounts['Account Balance'],
+            bins=[-np.inf, 100000, 300000, np.inf],
+            labels=['LOW', 'MEDIUM', 'HIGH']
+        ).fillna('LOW')
 
-        result_df['compliance_priority'] = result_df.apply(determine_priority, axis=1)
+        # Add compliance priority based on risk and inactivity
+        risk_score = risk_category.map({'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}).to_numpy(np.int8)
+        action_score = np.select(action_conditions, [3, 2, 1], default=0).astype(np.int8)
+        kyc_score = np.where(accounts['KYC Status'].to_numpy() == 'Expired', 2, 0).astype(np.int8)
+
+        total_score = risk_score + action_score + kyc_score
+        compliance_priority = np.select(
+            [total_score >= 6, total_score >= 4, total_score >= 2],
+            ['CRITICAL', 'HIGH', 'MEDIUM'],
+            default='LOW'
+        )
 
-        return result_df
+        # Build the result in one step instead of copying the inactive accounts and writing into the copy
+        self.compliance_results = accounts.assign(
+            recommended_action=recommended_action,
+            contact_status=contact_status,
+            risk_category=risk_category,
+            compliance_priority=compliance_priority
+        )
+        return self.compliance_results
 
     def get_summary_stats(self):
-        """Get summary statistics for the inactive accounts"""
+        """Get summary statistics for the inactive accounts, including compliance counts once marked"""
         if self.inactive_accounts is None or self.inactive_accounts.empty:
             return None
 
-        summary = {}
+        if self.compliance_results is not None:
+            return summarize_accounts(self.compliance_results)
+
+        return summarize_accounts(self.inactive_accounts)
 
-        # Count by account type
-        summary['type_counts'] = self.inactive_accounts['Account Type'].value_counts().to_dict()
 
-        # Count by branch
-        summary['branch_counts'] = self.inactive_accounts['Branch'].value_counts().to_dict()
+@st.cache_data(show_spinner=False)
+def summarize_accounts(accounts_df):
+    """Summary statistics for a set of accounts, cached on the dataframe contents"""
+    summary = {}
 
-        # Count by customer type
-        summary['customer_type_counts'] = self.inactive_accounts['Customer Type'].value_counts().to_dict()
+    # Count by account type
+    summary['type_counts'] = count_values(accounts_df['Account Type'])
 
-        # Count by KYC status
-        summary['kyc_status_counts'] = self.inactive_accounts['KYC Status'].value_counts().to_dict()
+    # Count by branch
+    summary['branch_counts'] = count_values(accounts_df['Branch'])
 
-        # Count by recommended action
-        if 'recommended_action' in self.inactive_accounts.columns:
-            summary['action_counts'] = self.inactive_accounts['recommended_action'].value_counts().to_dict()
+    # Count by customer type
+    summary['customer_type_counts'] = count_values(accounts_df['Customer Type'])
 
-        # Count by risk category
-        if 'risk_category' in self.inactive_accounts.columns:
-            summary['risk_counts'] = self.inactive_accounts['risk_category'].value_counts().to_dict()
+    # Count by KYC status
+    summary['kyc_status_counts'] = count_values(accounts_df['KYC Status'])
 
-        # Count by compliance priority
-        if 'compliance_priority' in self.inactive_accounts.columns:
-            summary['priority_counts'] = self.inactive_accounts['compliance_priority'].value_counts().to_dict()
+    # Count by recommended action
+    if 'recommended_action' in accounts_df.columns:
+        summary['action_counts'] = count_values(accounts_df['recommended_action'])
 
-        # Count by contact status
-        if 'contact_status' in self.inactive_accounts.columns:
-            summary['contact_counts'] = self.inactive_accounts['contact_status'].value_counts().to_dict()
+    # Count by risk category
+    if 'risk_category' in accounts_df.columns:
+        summary['risk_counts'] = count_values(accounts_df['risk_category'])
 
-        # Calculate statistics for account balance
-        summary['avg_balance'] = self.inactive_accounts['Account Balance'].mean()
-        summary['total_balance'] = self.inactive_accounts['Account Balance'].sum()
-        summary['max_balance'] = self.inactive_accounts['Account Balance'].max()
-        summary['min_balance'] = self.inactive_accounts['Account Balance'].min()
+    # Count by compliance priority
+    if 'compliance_priority' in accounts_df.columns:
+        summary['priority_counts'] = count_values(accounts_df['compliance_priority'])
 
-        return summary
+    # Count by contact status
+    if 'contact_status' in accounts_df.columns:
+        summary['contact_counts'] = count_values(accounts_df['contact_status'])
 
+    # Calculate statistics for account balance in a single aggregation call
+    balance = accounts_df['Account Balance'].agg(['mean', 'sum', 'max', 'min'])
+    summary['avg_balance'] = balance['mean']
+    summary['total_balance'] = balance['sum']
+    summary['max_balance'] = balance['max']
+    summary['min_balance'] = balance['min']
 
-def get_download_link(df, filename, text):
-    """Generate a download link for a dataframe"""
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">{text}</a>'
-    return href
+    return summary
+
+
+def counts_frame(counts, column):
+    """Turn a {value: count} dict from the summary statistics into a two-column frame for plotting"""
+    return pd.DataFrame(list(counts.items()), columns=[column, 'count'])
+
+
+def count_values(series):
+    """Count occurrences of each value, most frequent first, leaving out unused categories"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Categorical columns are counted with one bincount over their integer codes (-1 marks NaN)
+        codes = series.cat.codes.to_numpy()
+        counts = pd.Series(
+            np.bincount(codes[codes >= 0], minlength=len(series.cat.categories)),
+            index=series.cat.categories
+        )
+    else:
+        counts = series.value_counts()
+
+    return counts[counts > 0].sort_values(ascending=False, kind='stable').to_dict()
+
+
+def report_columns(df):
+    """Return the report columns present in the dataframe, in report order"""
+    return [column for column in REPORT_COLUMNS if column in df.columns]
+
+
+def write_csv_bytes(df):
+    """Write the report columns of a dataframe as UTF-8 CSV straight into a bytes buffer"""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, columns=report_columns(df), index=False, encoding='utf-8', lineterminator='\n',
+              date_format=DATE_FORMAT)
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    """Cached CSV export so the Export tab does not re-serialize every report on each rerun"""
+    return write_csv_bytes(df)
+
+
+@st.cache_data(show_spinner=False)
+def csv_bytes_by(df, column):
+    """Encode one CSV per distinct value of a column in a single groupby pass.
+    Keys keep the order in which the values first appear in the dataframe."""
+    return {value: write_csv_bytes(group) for value, group in df.groupby(column, sort=False, observed=True)}
 
 
 def main():
@@ -225,6 +373,8 @@ def main():
         st.session_state.compliance_results = None
     if 'summary_stats' not in st.session_state:
         st.session_state.summary_stats = None
+    if 'filter_options' not in st.session_state:
+        st.session_state.filter_options = None
 
     # Main app
     st.title("CBUAE Dormant Account Checker")
@@ -240,10 +390,9 @@ def main():
         inactivity_years = st.slider("Inactivity Period (Years)", min_value=1.0, max_value=10.0, value=3.0, step=0.5)
 
         # Account types to check
-        all_account_types = ["Savings/Call/Current", "Fixed Deposit", "Investment", "Safe Deposit"]
         account_types = st.multiselect(
             "Account Types to Check",
-            options=all_account_types,
+            options=ACCOUNT_TYPES,
             default=["Savings/Call/Current"]
         )
 
@@ -284,6 +433,12 @@ def main():
                         if compliance_results is not None:
                             st.session_state.compliance_results = compliance_results
 
+                            # Collect the filter choices once rather than scanning the columns on every rerun
+                            st.session_state.filter_options = {
+                                column: compliance_results[column].unique().tolist()
+                                for column in FILTER_COLUMNS if column in compliance_results.columns
+                            }
+
                             # Calculate summary statistics
                             st.session_state.summary_stats = checker.get_summary_stats()
                     else:
@@ -372,6 +527,8 @@ def main():
         # Data table tab
         with tab2:
             if st.session_state.compliance_results is not None:
+                filter_options = st.session_state.filter_options
+
                 # Add filters
                 st.subheader("Filter Options")
                 filter_cols = st.columns(4)
@@ -379,88 +536,102 @@ def main():
                 with filter_cols[0]:
                     account_type_filter = st.multiselect(
                         "Account Type",
-                        options=st.session_state.compliance_results['Account Type'].unique(),
-                        default=st.session_state.compliance_results['Account Type'].unique()
+                        options=filter_options['Account Type'],
+                        default=filter_options['Account Type']
                     )
 
                 with filter_cols[1]:
                     branch_filter = st.multiselect(
                         "Branch",
-                        options=st.session_state.compliance_results['Branch'].unique(),
-                        default=st.session_state.compliance_results['Branch'].unique()
+                        options=filter_options['Branch'],
+                        default=filter_options['Branch']
                     )
 
                 with filter_cols[2]:
                     customer_type_filter = st.multiselect(
                         "Customer Type",
-                        options=st.session_state.compliance_results['Customer Type'].unique(),
-                        default=st.session_state.compliance_results['Customer Type'].unique()
+                        options=filter_options['Customer Type'],
+                        default=filter_options['Customer Type']
                     )
 
                 with filter_cols[3]:
                     kyc_status_filter = st.multiselect(
                         "KYC Status",
-                        options=st.session_state.compliance_results['KYC Status'].unique(),
-                        default=st.session_state.compliance_results['KYC Status'].unique()
+                        options=filter_options['KYC Status'],
+                        default=filter_options['KYC Status']
                     )
 
                 # Second row of filters
                 filter_cols2 = st.columns(3)
 
                 with filter_cols2[0]:
-                    if 'recommended_action' in st.session_state.compliance_results.columns:
+                    if 'recommended_action' in filter_options:
                         action_filter = st.multiselect(
                             "Recommended Action",
-                            options=st.session_state.compliance_results['recommended_action'].unique(),
-                            default=st.session_state.compliance_results['recommended_action'].unique()
+                            options=filter_options['recommended_action'],
+                            default=filter_options['recommended_action']
                         )
                     else:
                         action_filter = None
 
                 with filter_cols2[1]:
-                    if 'risk_category' in st.session_state.compliance_results.columns:
+                    if 'risk_category' in filter_options:
                         risk_filter = st.multiselect(
                             "Risk Category",
-                            options=st.session_state.compliance_results['risk_category'].unique(),
-                            default=st.session_state.compliance_results['risk_category'].unique()
+                            options=filter_options['risk_category'],
+                            default=filter_options['risk_category']
                         )
                     else:
                         risk_filter = None
 
                 with filter_cols2[2]:
-                    if 'compliance_priority' in st.session_state.compliance_results.columns:
+                    if 'compliance_priority' in filter_options:
                         priority_filter = st.multiselect(
                             "Compliance Priority",
-                            options=st.session_state.compliance_results['compliance_priority'].unique(),
-                            default=st.session_state.compliance_results['compliance_priority'].unique()
+                            options=filter_options['compliance_priority'],
+                            default=filter_options['compliance_priority']
                         )
                     else:
                         priority_filter = None
 
-                # Apply filters
-                filtered_df = st.session_state.compliance_results[
-                    (st.session_state.compliance_results['Account Type'].isin(account_type_filter)) &
-                    (st.session_state.compliance_results['Branch'].isin(branch_filter)) &
-                    (st.session_state.compliance_results['Customer Type'].isin(customer_type_filter)) &
-                    (st.session_state.compliance_results['KYC Status'].isin(kyc_status_filter))
-                    ]
+                # Apply filters; the compliance filters only apply when something is selected
+                active_filters = {
+                    'Account Type': account_type_filter,
+                    'Branch': branch_filter,
+                    'Customer Type': customer_type_filter,
+                    'KYC Status': kyc_status_filter
+                }
 
                 if action_filter:
-                    filtered_df = filtered_df[filtered_df['recommended_action'].isin(action_filter)]
+                    active_filters['recommended_action'] = action_filter
 
                 if risk_filter:
-                    filtered_df = filtered_df[filtered_df['risk_category'].isin(risk_filter)]
+                    active_filters['risk_category'] = risk_filter
 
                 if priority_filter:
-                    filtered_df = filtered_df[filtered_df['compliance_priority'].isin(priority_filter)]
+                    active_filters['compliance_priority'] = priority_filter
+
+                # Combine all filter masks into one and slice the results once
+                compliance_results = st.session_state.compliance_results
+                filter_mask = np.logical_and.reduce([
+                    compliance_results[column].isin(selected).to_numpy()
+                    for column, selected in active_filters.items()
+                ])
+                filtered_df = compliance_results[filter_mask]
 
-                # Display table
+                # Display table; only a preview slice is sent to the browser, the full set stays in the Export tab
                 st.subheader("Dormant Accounts")
-                st.dataframe(filtered_df, use_container_width=True)
+                preview_rows = st.number_input("Rows to preview", min_value=100, max_value=5000, value=500,
+                                               step=100)
+                st.dataframe(filtered_df[report_columns(filtered_df)].head(preview_rows), use_container_width=True)
+                st.caption(f"Showing {min(preview_rows, len(filtered_df))} of {len(filtered_df)} accounts")
 
         # Visualizations tab
         with tab3:
             if st.session_state.compliance_results is not None:
+                # Bar charts reuse the counts already computed for the summary statistics
+                stats = st.session_state.summary_stats
+
                 st.subheader("Account Distribution Analysis")
 
                 viz_cols = st.columns(2)
@@ -477,7 +648,7 @@ def main():
 
                     # Branch distribution
                     fig3 = px.bar(
-                        st.session_state.compliance_results['Branch'].value_counts().reset_index(),
+                        counts_frame(stats['branch_counts'], 'Branch'),
                         x='Branch',  # Changed from 'index'
                         y='count',  # Changed from 'Branch'
                         title='Distribution by Branch',
@@ -512,9 +683,9 @@ def main():
 
                 with viz_cols2[0]:
                     # Recommended action distribution
-                    if 'recommended_action' in st.session_state.compliance_results.columns:
+                    if 'action_counts' in stats:
                         fig5 = px.bar(
-                            st.session_state.compliance_results['recommended_action'].value_counts().reset_index(),
+                            counts_frame(stats['action_counts'], 'recommended_action'),
                             x='recommended_action',  # Changed from 'index'
                             y='count',  # Changed from 'recommended_action'
                             title='Recommended Actions',
@@ -536,9 +707,9 @@ def main():
 
                 with viz_cols2[1]:
                     # Compliance priority distribution
-                    if 'compliance_priority' in st.session_state.compliance_results.columns:
+                    if 'priority_counts' in stats:
                         fig7 = px.bar(
-                            st.session_state.compliance_results['compliance_priority'].value_counts().reset_index(),
+                            counts_frame(stats['priority_counts'], 'compliance_priority'),
                             x='compliance_priority',  # Changed from 'index'
                             y='count',  # Changed from 'compliance_priority'
                             title='Compliance Priority',
@@ -606,7 +777,7 @@ def main():
                 st.markdown("### Full Report")
                 st.download_button(
                     label="Download Full Dormant Account Report (CSV)",
-                    data=st.session_state.compliance_results.to_csv(index=False).encode('utf-8'),
+                    data=to_csv_bytes(st.session_state.compliance_results),
                     file_name="dormant_accounts_full_report.csv",
                     mime="text/csv"
                 )
@@ -625,7 +796,7 @@ def main():
                         if not critical_df.empty:
                             st.download_button(
                                 label="Download Critical Priority Accounts (CSV)",
-                                data=critical_df.to_csv(index=False).encode('utf-8'),
+                                data=to_csv_bytes(critical_df),
                                 file_name="dormant_accounts_critical_priority.csv",
                                 mime="text/csv",
                                 key="download_critical"
@@ -639,7 +810,7 @@ def main():
                     if not kyc_expired_df.empty:
                         st.download_button(
                             label="Download KYC Expired Accounts (CSV)",
-                            data=kyc_expired_df.to_csv(index=False).encode('utf-8'),
+                            data=to_csv_bytes(kyc_expired_df),
                             file_name="dormant_accounts_kyc_expired.csv",
                             mime="text/csv",
                             key="download_kyc"
@@ -654,7 +825,7 @@ def main():
                     if not savings_df.empty:
                         st.download_button(
                             label="Download Savings/Call/Current Accounts (CSV)",
-                            data=savings_df.to_csv(index=False).encode('utf-8'),
+                            data=to_csv_bytes(savings_df),
                             file_name="dormant_accounts_savings_call_current.csv",
                             mime="text/csv",
                             key="download_savings"
@@ -669,7 +840,7 @@ def main():
                         if not no_contact_df.empty:
                             st.download_button(
                                 label="Download No Contact Accounts (CSV)",
-                                data=no_contact_df.to_csv(index=False).encode('utf-8'),
+                                data=to_csv_bytes(no_contact_df),
                                 file_name="dormant_accounts_no_contact.csv",
                                 mime="text/csv",
                                 key="download_no_contact"
@@ -680,21 +851,16 @@ def main():
                     st.markdown("### Action-Based Reports")
                     action_report_cols = st.columns(3)
 
-                    actions = st.session_state.compliance_results['recommended_action'].unique()
-                    for i, action in enumerate(actions):
+                    action_csvs = csv_bytes_by(st.session_state.compliance_results, 'recommended_action')
+                    for i, (action, action_csv) in enumerate(action_csvs.items()):
                         with action_report_cols[i % 3]:
-                            action_df = st.session_state.compliance_results[
-                                st.session_state.compliance_results['recommended_action'] == action
-                                ]
-
-                            if not action_df.empty:
-                                st.download_button(
-                                    label=f"Download {action} Accounts (CSV)",
-                                    data=action_df.to_csv(index=False).encode('utf-8'),
-                                    file_name=f"dormant_accounts_{action.lower()}.csv",
-                                    mime="text/csv",
-                                    key=f"download_{action}"
-                                )
+                            st.download_button(
+                                label=f"Download {action} Accounts (CSV)",
+                                data=action_csv,
+                                file_name=f"dormant_accounts_{action.lower()}.csv",
+                                mime="text/csv",
+                                key=f"download_{action}"
+                            )
 
 
 if __name__ == "__main__":
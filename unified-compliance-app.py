@@ -1,13 +1,14 @@
 import os
+import io
+import asyncio
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from langchain_groq import ChatGroq
-from langchain.chains import ConversationChain, LLMChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from fpdf import FPDF
 
 # === Authentication ===
 def login():
@@ -31,16 +32,35 @@ if not st.session_state.logged_in:
 st.set_page_config(page_title="Unified Banking Compliance Solution", layout="wide")
 
 # === Load LLM ===
+def groq_api_key():
+    # Read from .streamlit/secrets.toml, falling back to the environment
+    try:
+        return st.secrets["GROQ_API_KEY"]
+    except (KeyError, FileNotFoundError):
+        return os.environ.get("GROQ_API_KEY")
+
 @st.cache_resource(show_spinner=False)
 def load_llm():
-    os.environ["GROQ_API_KEY"] = "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"  # Replace with your actual key
-    return ChatGroq(temperature=0.3, model_name="llama3-70b-8192")
-
-llm = load_llm()
+    """Shared Groq client, created on first use so page loads that never reach an agent skip it"""
+    # Imported here so the login page renders without loading the LLM client
+    from langchain_groq import ChatGroq
+    api_key = groq_api_key()
+    if not api_key:
+        st.error("GROQ_API_KEY is not set. Add it to .streamlit/secrets.toml or the environment.")
+        st.stop()
+    return ChatGroq(temperature=0.3, model_name="llama3-70b-8192", groq_api_key=api_key)
 
 # === Database Setup ===
+# One connection per server process, shared by every rerun and session, so the pragmas and
+# table setup run once instead of reconnecting for each write or status query.
+# Sessions run on separate threads, so every use of the connection holds db_lock.
+@st.cache_resource(show_spinner=False)
 def init_db():
-    conn = sqlite3.connect("unified_compliance.db")
+    conn = sqlite3.connect("unified_compliance.db", check_same_thread=False)
+    # WAL lets the status queries read while agents write; NORMAL sync is safe with WAL
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     cursor = conn.cursor()
     # Dormant flag table
     cursor.execute("""
@@ -69,31 +89,255 @@ def init_db():
         )
     """)
     conn.commit()
-    return conn
+    return conn, threading.Lock()
+
+conn, db_lock = init_db()
 
-conn = init_db()
+@st.cache_data(ttl=5, show_spinner=False)
+def database_counts():
+    """Row counts for the sidebar status in a single query; writers clear this so their rows show at once"""
+    with db_lock:
+        return conn.execute("""
+            SELECT (SELECT COUNT(*) FROM dormant_flags),
+                   (SELECT COUNT(*) FROM dormant_ledger),
+                   (SELECT COUNT(*) FROM insight_log)
+        """).fetchone()
 
 # === File Upload ===
 uploaded_file = st.sidebar.file_uploader("Upload Account Dataset (CSV)", type="csv")
 
+# Text columns the agents match on, ignoring case and surrounding spaces
+NORMALIZED_COLUMNS = ["Account Type", "Account Status", "KYC Status",
+                      "Email Contact Attempt", "SMS Contact Attempt", "Phone Call Attempt"]
+
+# Low-cardinality text columns are read as categories, so every mask over them compares integer codes
+CATEGORY_COLUMNS = ["Account Type", "Branch", "Customer Type", "KYC Status", "Email Contact Attempt",
+                    "SMS Contact Attempt", "Phone Call Attempt", "Account Status"]
+
 @st.cache_data(show_spinner=False)
-def parse_csv(file):
-    df = pd.read_csv(file)
+def parse_csv(file_bytes):
+    df = pd.read_csv(io.BytesIO(file_bytes), dtype=dict.fromkeys(CATEGORY_COLUMNS, "category"))
     df['Last Transaction Date'] = pd.to_datetime(df['Last Transaction Date'], errors='coerce')
-    return df
+    # Stripped, lowercased copies of the matched columns, built once per upload and kept apart from df
+    # so they never reach the database, the tables or the exports. Categories make each match an int compare.
+    norm = pd.DataFrame({
+        column: df[column].astype(str).str.strip().str.lower().astype("category")
+        for column in NORMALIZED_COLUMNS
+    })
+    # Shared by every agent that needs "no attempt on any channel"
+    norm['No Contact'] = (
+        (norm['Email Contact Attempt'] == 'no') &
+        (norm['SMS Contact Attempt'] == 'no') &
+        (norm['Phone Call Attempt'] == 'no')
+    )
+    return df, norm
+
+def account_type_contains(norm, text):
+    """Mask of accounts whose normalized type contains text, matched once per category instead of per row"""
+    account_types = norm['Account Type']
+    return account_types.isin([category for category in account_types.cat.categories if text in category])
+
+CONTACT_CHANNELS = [("Email Contact Attempt", "Email"), ("SMS Contact Attempt", "SMS"), ("Phone Call Attempt", "Phone Call")]
+
+# "Channels Used" text for each email=1 / SMS=2 / phone=4 bit combination
+CHANNEL_LABELS = np.array([
+    ", ".join(name for bit, (_, name) in enumerate(CONTACT_CHANNELS) if bits >> bit & 1) or "None"
+    for bits in range(8)
+])
+
+# Columns of the sampled rows shown to the insight agents; IDs and contact flags add tokens but no insight
+PROMPT_COLUMNS = ["Account Type", "Branch", "Customer Type", "Account Balance", "KYC Status",
+                  "Last Transaction Date", "Account Status"]
+
+def summarize_for_prompt(data, sample_size=10):
+    """Compact text view of the detected accounts for the insight prompts:
+    totals, category breakdowns, inactivity age and a small sample of rows"""
+    lines = [f"Accounts: {len(data)}, total balance: {data['Account Balance'].sum():,.2f}"]
+    for column in ["Account Type", "Branch", "Customer Type", "Account Status"]:
+        counts = data[column].value_counts()
+        counts = counts[counts > 0]  # categories absent from this selection
+        lines.append(f"{column}: " + ", ".join(f"{value} {count}" for value, count in counts.items()))
+    years_inactive = ((pd.Timestamp.now() - data['Last Transaction Date']).dt.days // 365).value_counts().sort_index()
+    lines.append("Years since last transaction: " +
+                 ", ".join(f"{int(years)}y {count}" for years, count in years_inactive.items()))
+    # Fixed seed: the same accounts always give the same summary, so cached insights can be reused
+    sample = data[PROMPT_COLUMNS].sample(n=min(sample_size, len(data)), random_state=0)
+    lines.append("Sample rows:\n" + sample.to_csv(index=False, date_format="%Y-%m-%d"))
+    return "\n".join(lines)
 
 def save_to_db(df, table_name="accounts_data"):
-    conn = sqlite3.connect("unified_compliance.db")
-    df.to_sql(table_name, conn, if_exists="replace", index=False)
-    conn.close()
+    with db_lock:
+        df.to_sql(table_name, conn, if_exists="replace", index=False)
 
 def save_summary_to_db(observation, trend, insight, action):
-    conn = sqlite3.connect("unified_compliance.db")
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO insight_log VALUES (?, ?, ?, ?, ?)",
-                   (datetime.now().isoformat(), observation, trend, insight, action))
-    conn.commit()
-    conn.close()
+    with db_lock, conn:
+        conn.execute("INSERT INTO insight_log VALUES (?, ?, ?, ?, ?)",
+                     (datetime.now().isoformat(), observation, trend, insight, action))
+    database_counts.clear()
+
+# === Dormant Detection Agents ===
+# Each agent maps the parsed accounts, their normalized columns and the inactivity mask to the accounts it reports
+DORMANT_AGENTS = {
+    "🔐 Safe Deposit Box Agent": lambda df, norm, inactive: (
+        account_type_contains(norm, "safe deposit") & inactive & norm['No Contact']),
+    "💼 Investment Inactivity Agent": lambda df, norm, inactive: (
+        account_type_contains(norm, "investment") & inactive & norm['No Contact']),
+    "🏦 Fixed Deposit Agent": lambda df, norm, inactive: (norm['Account Type'] == 'fixed deposit') & inactive,
+    "📉 3-Year General Inactivity Agent": lambda df, norm, inactive: (
+        df['Account Type'].isin(["Savings", "Call", "Current"]) & inactive),
+    "📵 Unreachable + No Active Accounts Agent": lambda df, norm, inactive: (
+        norm['No Contact'] & (norm['Account Status'] == 'dormant')),
+}
+
+@st.cache_data(show_spinner=False)
+def dormant_agent_masks(file_bytes, threshold):
+    """Row masks of every detection agent, computed together once per upload and threshold date
+    so switching agents only selects rows"""
+    df, norm = parse_csv(file_bytes)
+    inactive = df['Last Transaction Date'] <= threshold
+    return {agent: mask(df, norm, inactive).to_numpy() for agent, mask in DORMANT_AGENTS.items()}
+
+@st.cache_resource(show_spinner=False)
+def insight_chains():
+    """Observation, trend, narration and action chains; each streams its answer as plain text"""
+    from langchain.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    observation_prompt = PromptTemplate(
+        input_variables=["data"],
+        template="""
+        You are a senior bank analyst. Provide insights on:
+        - 📈 Dormancy Trends
+        - 🔁 Activity Shift
+        - 🏦 Branch-Level Observations
+        - 🧍‍♂️ Customer Segments
+        - ⚠️ Risk Pockets
+        - 💰 Balance Irregularities
+
+        Data:
+        {data}
+
+        Output only observations.
+        """
+    )
+    trend_prompt = PromptTemplate(
+        input_variables=["data"],
+        template="""
+        You are a data strategist. Analyze the following:
+        - 📉 Dormancy Risk Movement
+        - 🧭 Key Contributors
+        - 🧮 Change Metrics
+
+        Data:
+        {data}
+
+        Output analytical narrative only.
+        """
+    )
+    narration_prompt = PromptTemplate(
+        input_variables=["observation", "trend"],
+        template="""
+        You are writing a CXO summary.
+
+        🔎 Observation:
+        {observation}
+
+        📊 Trend:
+        {trend}
+
+        Output a polished executive summary.
+        """
+    )
+    action_prompt = PromptTemplate(
+        input_variables=["observation", "trend"],
+        template="""
+        You are a strategic advisor. Based on:
+        🔎 Observation:
+        {observation}
+
+        📊 Trend:
+        {trend}
+
+        Suggest actionable steps to reduce dormancy and risk.
+        """
+    )
+
+    llm = load_llm()
+    return tuple(prompt | llm | StrOutputParser()
+                 for prompt in (observation_prompt, trend_prompt, narration_prompt, action_prompt))
+
+# Most recent selection summaries whose insight outputs are kept for reuse
+INSIGHT_STORE_ENTRIES = 64
+
+@st.cache_resource(show_spinner=False)
+def insight_store():
+    """Insight outputs by prompt summary, shared by all sessions so a selection is only sent to Groq once.
+    Least recently used summaries are dropped past INSIGHT_STORE_ENTRIES; access goes through the lock."""
+    return OrderedDict(), threading.Lock()
+
+def stored_insights(sample_data):
+    store, lock = insight_store()
+    with lock:
+        if sample_data not in store:
+            return None
+        store.move_to_end(sample_data)
+        return store[sample_data]
+
+def store_insights(sample_data, outputs):
+    store, lock = insight_store()
+    with lock:
+        store[sample_data] = outputs
+        store.move_to_end(sample_data)
+        while len(store) > INSIGHT_STORE_ENTRIES:
+            store.popitem(last=False)
+
+# Minimum gap between redraws of a streaming answer; each redraw resends the whole text so far
+STREAM_REFRESH_SECONDS = 0.25
+
+async def stream_into(placeholder, chain, inputs):
+    """Render a chain's answer in placeholder as its tokens arrive and return the full text"""
+    text = ""
+    last_refresh = time.monotonic()
+    async for token in chain.astream(inputs):
+        text += token
+        if time.monotonic() - last_refresh >= STREAM_REFRESH_SECONDS:
+            placeholder.markdown(text)
+            last_refresh = time.monotonic()
+    placeholder.markdown(text)
+    return text
+
+async def stream_insights(sample_data, placeholders):
+    """Stream the four insight chains into their placeholders and return the completed outputs"""
+    obs_chain, trend_chain, narration_chain, action_chain = insight_chains()
+    obs_box, trend_box, insight_box, action_box = placeholders
+    # Observation and trend only need the sample; narration and action only need those two
+    # completed outputs, so each pair of Groq calls streams concurrently
+    observation, trend = await asyncio.gather(
+        stream_into(obs_box, obs_chain, {"data": sample_data}),
+        stream_into(trend_box, trend_chain, {"data": sample_data})
+    )
+    findings = {"observation": observation, "trend": trend}
+    insight, action = await asyncio.gather(
+        stream_into(insight_box, narration_chain, findings),
+        stream_into(action_box, action_chain, findings)
+    )
+    return observation, trend, insight, action
+
+@st.cache_data(show_spinner=False)
+def build_pdf(observation, trend, insight, action):
+    """Executive summary PDF built in memory from the cached insights; repeated downloads reuse the bytes"""
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, "Executive Summary Report")
+    pdf.multi_cell(0, 10, f"Observation:\n{observation}")
+    pdf.multi_cell(0, 10, f"Trend:\n{trend}")
+    pdf.multi_cell(0, 10, f"Insight:\n{insight}")
+    pdf.multi_cell(0, 10, f"Action Plan:\n{action}")
+    # Legacy fpdf returns a latin-1 str here, fpdf2 returns a bytearray
+    out = pdf.output(dest="S")
+    return out.encode("latin-1") if isinstance(out, str) else bytes(out)
 
 # === Main App Mode Selection ===
 app_mode = st.sidebar.selectbox("Select Application Mode", [
@@ -104,145 +348,50 @@ app_mode = st.sidebar.selectbox("Select Application Mode", [
 st.title(f"{app_mode}")
 
 if uploaded_file:
-    df = parse_csv(uploaded_file)
-    save_to_db(df)
+    df, norm = parse_csv(uploaded_file.getvalue())
+    # Replace the stored table only when a new file is uploaded, not on every rerun
+    if st.session_state.get("saved_file_id") != uploaded_file.file_id:
+        save_to_db(df)
+        st.session_state.saved_file_id = uploaded_file.file_id
     st.success("Dataset uploaded successfully!")
     
     # === DORMANT ACCOUNT ANALYZER MODE ===
     if app_mode == "🏦 Dormant Account Analyzer":
-        threshold = datetime.now() - timedelta(days=3 * 365)
-        
-        agent_option = st.selectbox("🧭 Choose Dormant Detection Agent", [
-            "🔐 Safe Deposit Box Agent",
-            "💼 Investment Inactivity Agent",
-            "🏦 Fixed Deposit Agent",
-            "📉 3-Year General Inactivity Agent",
-            "📵 Unreachable + No Active Accounts Agent"
-        ])
+        threshold = pd.Timestamp(datetime.now().date() - timedelta(days=3 * 365))
 
-        if agent_option == "🔐 Safe Deposit Box Agent":
-            data = df[(df['Account Type'].str.contains("Safe Deposit", case=False, na=False)) &
-                    (df['Last Transaction Date'] < threshold) &
-                    (df['Email Contact Attempt'].str.lower() == 'no') &
-                    (df['SMS Contact Attempt'].str.lower() == 'no') &
-                    (df['Phone Call Attempt'].str.lower() == 'no')]
-        elif agent_option == "💼 Investment Inactivity Agent":
-            data = df[(df['Account Type'].str.contains("Investment", case=False, na=False)) &
-                    (df['Last Transaction Date'] < threshold) &
-                    (df['Email Contact Attempt'].str.lower() == 'no') &
-                    (df['SMS Contact Attempt'].str.lower() == 'no') &
-                    (df['Phone Call Attempt'].str.lower() == 'no')]
-        elif agent_option == "🏦 Fixed Deposit Agent":
-            data = df[(df['Account Type'].str.lower() == 'fixed deposit') & (df['Last Transaction Date'] < threshold)]
-        elif agent_option == "📉 3-Year General Inactivity Agent":
-            data = df[(df['Account Type'].isin(["Savings", "Call", "Current"])) & (df['Last Transaction Date'] < threshold)]
-        else:
-            data = df[(df['Email Contact Attempt'].str.lower() == 'no') &
-                    (df['SMS Contact Attempt'].str.lower() == 'no') &
-                    (df['Phone Call Attempt'].str.lower() == 'no') &
-                    (df['Account Status'].str.lower() == 'dormant')]
+        agent_option = st.selectbox("🧭 Choose Dormant Detection Agent", list(DORMANT_AGENTS))
+
+        data = df[dormant_agent_masks(uploaded_file.getvalue(), threshold)[agent_option]]
 
         st.success(f"{len(data)} accounts detected. Data stored for compliance processing.")
         st.dataframe(data.head(15))
         
         # === Multi-Agent Insight Chains ===
-        sample_data = data.sample(n=min(15, len(data))).to_csv(index=False)
-
-        observation_prompt = PromptTemplate(
-            input_variables=["data"],
-            template="""
-            You are a senior bank analyst. Provide insights on:
-            - 📈 Dormancy Trends
-            - 🔁 Activity Shift
-            - 🏦 Branch-Level Observations
-            - 🧍‍♂️ Customer Segments
-            - ⚠️ Risk Pockets
-            - 💰 Balance Irregularities
-
-            Data:
-            {data}
-
-            Output only observations.
-            """
-        )
-        trend_prompt = PromptTemplate(
-            input_variables=["data"],
-            template="""
-            You are a data strategist. Analyze the following:
-            - 📉 Dormancy Risk Movement
-            - 🧭 Key Contributors
-            - 🧮 Change Metrics
-
-            Data:
-            {data}
-
-            Output analytical narrative only.
-            """
-        )
-        narration_prompt = PromptTemplate(
-            input_variables=["observation", "trend"],
-            template="""
-            You are writing a CXO summary.
-
-            🔎 Observation:
-            {observation}
-
-            📊 Trend:
-            {trend}
-
-            Output a polished executive summary.
-            """
-        )
-        action_prompt = PromptTemplate(
-            input_variables=["observation", "trend"],
-            template="""
-            You are a strategic advisor. Based on:
-            🔎 Observation:
-            {observation}
-
-            📊 Trend:
-            {trend}
-
-            Suggest actionable steps to reduce dormancy and risk.
-            """
-        )
+        sample_data = summarize_for_prompt(data)
 
-        obs_chain = LLMChain(llm=llm, prompt=observation_prompt)
-        trend_chain = LLMChain(llm=llm, prompt=trend_prompt)
-        narration_chain = LLMChain(llm=llm, prompt=narration_prompt)
-        action_chain = LLMChain(llm=llm, prompt=action_prompt)
+        # Reruns for an already analysed selection reuse the outputs; otherwise stream them in and log them
+        insights = stored_insights(sample_data)
 
-        with st.spinner("Running insight agents..."):
-            obs_output = obs_chain.run(data=sample_data)
-            trend_output = trend_chain.run(data=sample_data)
-            final_insight = narration_chain.run(observation=obs_output, trend=trend_output)
-            action_output = action_chain.run(observation=obs_output, trend=trend_output)
+        # Expanders start open while answers stream so the text is visible as it arrives
+        placeholders = []
+        for title in ["🔍 Observation Insight", "📊 Trend Insight", "📌 CXO Summary", "🚀 Recommended Actions"]:
+            with st.expander(title, expanded=insights is None):
+                placeholders.append(st.empty())
 
-        save_summary_to_db(obs_output, trend_output, final_insight, action_output)
-
-        with st.expander("🔍 Observation Insight"):
-            st.markdown(obs_output)
-        with st.expander("📊 Trend Insight"):
-            st.markdown(trend_output)
-        with st.expander("📌 CXO Summary"):
-            st.markdown(final_insight)
-        with st.expander("🚀 Recommended Actions"):
-            st.markdown(action_output)
+        if insights is not None:
+            for placeholder, text in zip(placeholders, insights):
+                placeholder.markdown(text)
+        else:
+            with st.spinner("Running insight agents..."):
+                insights = asyncio.run(stream_insights(sample_data, placeholders))
+            store_insights(sample_data, insights)
+            save_summary_to_db(*insights)
+        obs_output, trend_output, final_insight, action_output = insights
 
         # PDF Export
         if st.button("📄 Download Executive Summary PDF"):
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            pdf.multi_cell(0, 10, "Executive Summary Report")
-            pdf.multi_cell(0, 10, f"Observation:\n{obs_output}")
-            pdf.multi_cell(0, 10, f"Trend:\n{trend_output}")
-            pdf.multi_cell(0, 10, f"Insight:\n{final_insight}")
-            pdf.multi_cell(0, 10, f"Action Plan:\n{action_output}")
-            pdf_path = "executive_summary.pdf"
-            pdf.output(pdf_path)
-            with open(pdf_path, "rb") as f:
-                st.download_button("Download PDF", f, file_name="executive_summary.pdf")
+            pdf_bytes = build_pdf(obs_output, trend_output, final_insight, action_output)
+            st.download_button("Download PDF", data=pdf_bytes, file_name="executive_summary.pdf", mime="application/pdf")
     
     # === COMPLIANCE MULTI-AGENT MODE ===
     elif app_mode == "🔒 Compliance Multi-Agent":
@@ -257,66 +406,51 @@ if uploaded_file:
         output_df = pd.DataFrame()
 
         if agent == "📨 Contact Attempt Agent":
-            results = []
-            for _, row in df.iterrows():
-                channels = []
-                if str(row.get("Email Contact Attempt", "")).strip().lower() == "yes":
-                    channels.append("Email")
-                if str(row.get("SMS Contact Attempt", "")).strip().lower() == "yes":
-                    channels.append("SMS")
-                if str(row.get("Phone Call Attempt", "")).strip().lower() == "yes":
-                    channels.append("Phone Call")
-                results.append({
-                    "Account ID": row.get("Account ID"),
-                    "Channels Used": ", ".join(channels) or "None",
-                    "Contact Attempt Status": "Pass" if len(channels) == 3 else "Fail"
-                })
-            output_df = pd.DataFrame(results)
+            contact_bits = np.zeros(len(df), dtype=np.uint8)
+            for bit, (column, _) in enumerate(CONTACT_CHANNELS):
+                contact_bits |= norm[column].eq("yes").to_numpy(np.uint8) << bit
+            output_df = pd.DataFrame({
+                "Account ID": df["Account ID"].to_numpy(),
+                "Channels Used": CHANNEL_LABELS[contact_bits],
+                "Contact Attempt Status": np.where(contact_bits == 7, "Pass", "Fail")
+            }, copy=False)
             st.subheader("📨 Contact Attempt Agent")
             st.dataframe(output_df)
-            st.markdown(f"**Summary:** {len(output_df)} accounts processed. {len(output_df[output_df['Contact Attempt Status'] == 'Pass'])} passed.")
+            st.markdown(f"**Summary:** {len(output_df)} accounts processed. {np.count_nonzero(contact_bits == 7)} passed.")
             st.markdown("- Retry contact for failed attempts\n- Verify communication data\n- Automate follow-ups")
 
         elif agent == "🚩 Flag Dormant Agent":
-            cursor = conn.cursor()
-            results = []
-            for _, row in df.iterrows():
-                status = str(row.get("Account Status", "")).strip().lower()
-                if status == "dormant" or not row.get("Last Transaction Date"):
-                    acc_id = row["Account ID"]
-                    results.append({"Account ID": acc_id, "Flag Update Instruction": "Apply Dormancy Flag"})
-                    cursor.execute("INSERT OR REPLACE INTO dormant_flags (account_id, flag_instruction) VALUES (?, ?)", 
-                                  (acc_id, "Apply Dormancy Flag"))
-            conn.commit()
-            output_df = pd.DataFrame(results)
+            flagged = norm["Account Status"].eq("dormant") | df["Last Transaction Date"].isna()
+            flagged_ids = df.loc[flagged, "Account ID"].tolist()
+            # One transaction for the whole batch
+            with db_lock, conn:
+                conn.executemany("INSERT OR REPLACE INTO dormant_flags (account_id, flag_instruction) VALUES (?, ?)",
+                                 [(acc_id, "Apply Dormancy Flag") for acc_id in flagged_ids])
+            database_counts.clear()
+            output_df = pd.DataFrame({"Account ID": flagged_ids, "Flag Update Instruction": "Apply Dormancy Flag"})
             st.subheader("🚩 Flag Dormant Agent")
             st.dataframe(output_df)
             st.markdown(f"**Summary:** {len(output_df)} accounts flagged as dormant.")
             st.markdown("- Apply flags in system\n- Notify clients\n- Log and audit actions")
 
         elif agent == "📘 Dormant Ledger Agent":
-            cursor = conn.cursor()
-            results = []
-            for _, row in df.iterrows():
-                if str(row.get("Account Status", "")).strip().lower() == "dormant":
-                    acc_id = row["Account ID"]
-                    results.append({"Account ID": acc_id, "Ledger Reclassification": "Move to Internal Dormant Ledger"})
-                    cursor.execute("INSERT OR REPLACE INTO dormant_ledger (account_id, classification) VALUES (?, ?)", 
-                                  (acc_id, "Moved to Dormant Ledger"))
-            conn.commit()
-            output_df = pd.DataFrame(results)
+            dormant_ids = df.loc[norm["Account Status"].eq("dormant"), "Account ID"].tolist()
+            # One transaction for the whole batch
+            with db_lock, conn:
+                conn.executemany("INSERT OR REPLACE INTO dormant_ledger (account_id, classification) VALUES (?, ?)",
+                                 [(acc_id, "Moved to Dormant Ledger") for acc_id in dormant_ids])
+            database_counts.clear()
+            output_df = pd.DataFrame({"Account ID": dormant_ids, "Ledger Reclassification": "Move to Internal Dormant Ledger"})
             st.subheader("📘 Dormant Ledger Agent")
             st.dataframe(output_df)
             st.markdown(f"**Summary:** {len(output_df)} accounts moved to dormant ledger.")
             st.markdown("- Maintain internal classification\n- Use for audit purposes\n- Review yearly")
 
         elif agent == "❄️ Freeze Account Agent":
-            df["Freeze Status"] = df.apply(
-                lambda row: "Frozen" if row.get("Account Status", "").lower() == "dormant" and 
-                            pd.to_datetime(row.get("Last Transaction Date")) < pd.to_datetime("2022-01-01") and 
-                            row.get("KYC Status", "").lower() == "expired" else "Active",
-                axis=1
-            )
+            frozen = (norm["Account Status"].eq("dormant") &
+                      (df["Last Transaction Date"] < pd.Timestamp("2022-01-01")) &
+                      norm["KYC Status"].eq("expired"))
+            df["Freeze Status"] = np.where(frozen, "Frozen", "Active")
             output_df = df[df["Freeze Status"] == "Frozen"]
             st.subheader("❄️ Freeze Account Agent")
             st.dataframe(output_df[["Account ID", "Account Type", "Branch", "Freeze Status"]])
@@ -324,10 +458,10 @@ if uploaded_file:
             st.markdown("- Restrict withdrawals\n- Trigger KYC update\n- Notify stakeholders")
 
         elif agent == "🏦 Transfer to CBUAE Agent":
-            cutoff = datetime.strptime("2020-04-24", "%Y-%m-%d")
-            df["Transfer Status"] = df["Last Transaction Date"].apply(
-                lambda d: "Eligible for Transfer" if pd.notna(d) and d <= cutoff else "Not Eligible"
-            )
+            cutoff = pd.Timestamp("2020-04-24")
+            # NaT compares False, so accounts without a transaction date are never eligible
+            eligible = df["Last Transaction Date"] <= cutoff
+            df["Transfer Status"] = np.where(eligible, "Eligible for Transfer", "Not Eligible")
             output_df = df[df["Transfer Status"] == "Eligible for Transfer"]
             st.subheader("🏦 Transfer to CBUAE Agent")
             st.dataframe(output_df[["Account ID", "Account Type", "Branch", "Transfer Status"]])
@@ -342,12 +476,11 @@ if uploaded_file:
 st.subheader("💬 Ask Compliance Bot")
 user_input = st.text_input("Ask a question:")
 
-if "chatbot_memory" not in st.session_state:
-    # Fix: Make sure memory uses the right key that matches what the prompt expects
-    st.session_state.chatbot_memory = ConversationBufferMemory(memory_key="chat_history")
-
-if "chatbot_chain" not in st.session_state:
-    prompt_template = PromptTemplate(
+@st.cache_resource(show_spinner=False)
+def chatbot_prompt():
+    """Compliance bot prompt, built once per process and shared by every session's chain"""
+    from langchain.prompts import PromptTemplate
+    return PromptTemplate(
         input_variables=["chat_history", "input"],
         template="""
         You are a banking compliance assistant with expertise in dormant accounts, regulatory compliance, 
@@ -366,29 +499,25 @@ if "chatbot_chain" not in st.session_state:
         Human: {input}
         AI: """
     )
-    
-    st.session_state.chatbot_chain = ConversationChain(
-        llm=llm,
-        prompt=prompt_template,
-        memory=st.session_state.chatbot_memory,
-        verbose=False
-    )
+
+def build_chatbot(llm):
+    """Memory and conversation chain for one session; memory stays per session so users never see each other's history"""
+    from langchain.chains import ConversationChain
+    from langchain.memory import ConversationBufferMemory
+    # Fix: Make sure memory uses the right key that matches what the prompt expects
+    memory = ConversationBufferMemory(memory_key="chat_history")
+    chain = ConversationChain(llm=llm, prompt=chatbot_prompt(), memory=memory, verbose=False)
+    return memory, chain
 
 if user_input:
+    if "chatbot_chain" not in st.session_state:
+        st.session_state.chatbot_memory, st.session_state.chatbot_chain = build_chatbot(load_llm())
     response = st.session_state.chatbot_chain.run(input=user_input)
     st.markdown(f"**Bot:** {response}")
 
 # Show database status
 st.sidebar.subheader("Database Status")
-conn = sqlite3.connect("unified_compliance.db")
-cursor = conn.cursor()
-cursor.execute("SELECT COUNT(*) FROM dormant_flags")
-flag_count = cursor.fetchone()[0]
-cursor.execute("SELECT COUNT(*) FROM dormant_ledger")
-ledger_count = cursor.fetchone()[0]
-cursor.execute("SELECT COUNT(*) FROM insight_log")
-insight_count = cursor.fetchone()[0]
-conn.close()
+flag_count, ledger_count, insight_count = database_counts()
 
 st.sidebar.info(f"""
 📊 System Status: